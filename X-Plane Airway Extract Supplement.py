@@ -1,11 +1,15 @@
 import csv
 import re
 import os
+import sys
 import logging
 import datetime
+import itertools
+import operator
+from collections import Counter, defaultdict
+from functools import lru_cache
 from tqdm import tqdm
-from typing import Dict, List, Optional, Set, Tuple
-from dataclasses import dataclass
+from typing import BinaryIO, Dict, FrozenSet, Iterator, List, Optional, Set, Tuple
 from enum import Enum
 
 logging.basicConfig(
@@ -23,75 +27,29 @@ class NavigationType(Enum):
         self.code_type = code_type
         self.type_code = type_code
 
-@dataclass
-class NavigationPoint:
-    identifier: str
-    type: NavigationType
-    area_code: Optional[str] = None
+# Fixed-width column layout of an airway segment line. The bound format method
+# is built once; the prefix and suffix are shared by both directions of a row.
+SEGMENT_PREFIX_FORMAT = "{:>5}{:>3}{:>3}{:>6}{:>3}{:>3}{:>2}".format
+# The two columns before the designator are fixed, so they are formatted only once
+SEGMENT_SUFFIX_START = "{:>4}{:>4} ".format('0', '600')
 
-def get_navigation_type(code_type: str) -> Optional[NavigationType]:
-    """Get the navigation type from the code type string.
-    
-    Args:
-        code_type: String representing the navigation type code
-        
-    Returns:
-        NavigationType enum if found, None otherwise
-    """
-    if not code_type:
-        logging.error("Empty code type provided")
-        return None
-        
-    for nav_type in NavigationType:
-        if nav_type.code_type == code_type:
-            return nav_type
-    logging.warning(f"Unknown navigation type encountered: {code_type}")
-    return None
+# Number of most frequent unresolved points listed in the skip summary
+MISSING_POINTS_REPORT_LIMIT = 20
 
-def process_navigation_point(
-    identifier: str,
-    code_type: str,
-    earth_fix_data: Dict[str, str],
-    earth_nav_data: Dict[str, str]
-) -> Optional[NavigationPoint]:
-    """Process a navigation point and return its details.
-    
-    Args:
-        identifier: The navigation point identifier
-        code_type: The type of navigation point
-        earth_fix_data: Dictionary of fix point data
-        earth_nav_data: Dictionary of navigation point data
-        
-    Returns:
-        NavigationPoint object if valid, None otherwise
-    """
-    if not identifier:
-        logging.error("Empty identifier provided")
-        return None
-        
-    nav_type = get_navigation_type(code_type)
-    if not nav_type:
-        return None
+# Progress bars refresh at most this often (seconds / iterations) so the bar
+# itself does not slow down the per-line loops
+PROGRESS_MIN_INTERVAL = 1.0
+PROGRESS_MIN_ITERS = 10000
 
-    # Get area code based on navigation type
-    area_code = None
-    if nav_type == NavigationType.DESIGNATED_POINT:
-        area_code = earth_fix_data.get(identifier)
-        if not area_code:
-            logging.warning(f"No area code found for fix point {identifier}")
-    else:  # VORDME or NDB
-        area_code = earth_nav_data.get(identifier)
-        if not area_code:
-            logging.warning(f"No area code found for {nav_type.code_type} point {identifier}")
+# Buffer size for writing output files, large enough to keep write calls rare
+WRITE_BUFFER_SIZE = 1 << 23
 
-    if not area_code:
-        return None
+# Line ending of the rewritten earth_awy.dat. The file is written in binary
+# mode, so the platform ending a text-mode file would use is applied here.
+OUTPUT_NEWLINE = os.linesep.encode('ascii')
 
-    return NavigationPoint(
-        identifier=identifier,
-        type=nav_type,
-        area_code=area_code
-    )
+# Airway designator split into its letter prefix and numeric suffix (e.g. W123)
+DESIGNATOR_PATTERN = re.compile(r"([A-Z]+)(\d*)$")
 
 def load_fixed_width_data(filepath: str, key_index: int, value_index: int, 
                           extra_condition_index: Optional[int] = None, 
@@ -113,46 +71,91 @@ def load_fixed_width_data(filepath: str, key_index: int, value_index: int,
     Returns:
         Dictionary mapping keys to values from the specified file
     """
-    data = {}
     try:
         if not os.path.exists(filepath):
             logging.error(f"File not found: {filepath}")
             return {}
             
-        with open(filepath, 'r', encoding='utf-8') as file:
-            for line_num, line in enumerate(file, 1):
+        # Resolve the filter settings once instead of on every line. Lines are
+        # matched as raw bytes, so the filter values are encoded up front.
+        accepted_values: FrozenSet[bytes] = frozenset()
+        if extra_condition_index is not None and extra_condition_values is not None:
+            accepted_values = frozenset(value.encode('utf-8') for value in extra_condition_values)
+        else:
+            extra_condition_index = None
+        type_bytes: Optional[bytes] = None
+        if type_index is not None and type_value is not None:
+            type_bytes = type_value.encode('utf-8')
+        else:
+            type_index = None
+            
+        # Column counts needed for the key/value and for every checked column
+        key_columns = max(key_index, value_index) + 1
+        required_columns = max(
+            key_columns,
+            (extra_condition_index if extra_condition_index is not None else -1) + 1,
+            (type_index if type_index is not None else -1) + 1
+        )
+            
+        # Read and split the whole file in one call rather than line by line.
+        # Binary mode skips decoding lines that are filtered out anyway.
+        with open(filepath, 'rb') as file:
+            lines = file.read().splitlines()
+            
+        # Skip header line that starts with 'I' or 'A' (X-Plane format headers)
+        first_line = 1
+        if lines and lines[0].strip().startswith((b'I', b'A')):
+            first_line = 2
+            
+        get_key_value = operator.itemgetter(key_index, value_index)
+        # Lines too short for the key/value, reported once at the end
+        short_line_count = 0
+        first_short_line: Optional[int] = None
+        
+        def matching_pairs() -> Iterator[Tuple[str, str]]:
+            """Yield the decoded (key, value) pair of every line passing the filters."""
+            nonlocal short_line_count, first_short_line
+            for line_num, line in enumerate(itertools.islice(lines, first_line - 1, None), first_line):
+                # Cheap substring check rejects most lines before splitting them
+                if type_bytes is not None and type_bytes not in line:
+                    continue
+                
                 line = line.strip()
                 if not line:  # Skip empty lines
                     continue
                 
-                # Skip header lines that start with 'I' or 'A' (X-Plane format headers)
-                if line_num == 1 and (line.startswith('I') or line.startswith('A')):
-                    continue
-                    
                 # Skip terminator lines ("99")
-                if line == "99":
+                if line == b"99":
                     continue
-                    
+                
                 parts = line.split()
-                if len(parts) <= max(key_index, value_index):
-                    logging.warning(f"Line {line_num} has insufficient columns: {line}")
+                if len(parts) < required_columns:
+                    if len(parts) < key_columns:
+                        short_line_count += 1
+                        if first_short_line is None:
+                            first_short_line = line_num
                     continue
-                    
+                
                 # Check conditions
-                condition_met = True
-                if extra_condition_index is not None and extra_condition_values is not None:
-                    if len(parts) <= extra_condition_index or parts[extra_condition_index] not in extra_condition_values:
-                        condition_met = False
-                        
-                if type_index is not None and type_value is not None:
-                    if len(parts) <= type_index or parts[type_index] != type_value:
-                        condition_met = False
+                if extra_condition_index is not None and parts[extra_condition_index] not in accepted_values:
+                    continue
                 
-                if condition_met:
-                    key = parts[key_index]
-                    value = parts[value_index]
-                    data[key] = value
-                    
+                if type_index is not None and parts[type_index] != type_bytes:
+                    continue
+                
+                # Only the stored key and value are decoded
+                key, value = get_key_value(parts)
+                yield key.decode('utf-8'), value.decode('utf-8')
+            
+        # dict() builds the whole table from the pairs in one call
+        data = dict(matching_pairs())
+        
+        if short_line_count:
+            logging.warning(
+                f"Skipped {short_line_count} lines with insufficient columns in {filepath} "
+                f"(first at line {first_short_line})"
+            )
+            
         return data
         
     except Exception as e:
@@ -160,33 +163,25 @@ def load_fixed_width_data(filepath: str, key_index: int, value_index: int,
         return {}
 
 
-def sort_key(line: str) -> tuple:
+@lru_cache(maxsize=None)
+def designator_sort_key(designator: str) -> tuple:
     """
-    Extract sort key from a line based on the last component.
+    Build the sort key for an airway designator.
+    
+    Results are cached since the same designator is shared by many segments.
     
     Args:
-        line: Text line to analyze
+        designator: Airway designator (TXT_DESIG)
         
     Returns:
         Tuple for sorting (letters, numbers)
-        
-    Raises:
-        ValueError: If the line is empty or invalid
     """
-    if not line or not isinstance(line, str):
-        raise ValueError("Invalid input: line must be a non-empty string")
-        
-    parts = line.split()
-    if not parts:
-        raise ValueError("Empty line provided")
-        
-    last_part = parts[-1]
-    match = re.match(r"([A-Z]+)(\d*)$", last_part)
+    match = DESIGNATOR_PATTERN.match(designator)
     if match:
         letters, numbers = match.groups()
         numbers = int(numbers) if numbers else 0
         return (letters, numbers)
-    return (last_part, float('inf'))
+    return (designator, float('inf'))
 
 
 def get_current_airac_cycle() -> str:
@@ -240,13 +235,18 @@ def get_current_airac_cycle() -> str:
     
     return current_cycle
 
-def filter_earth_awy(input_file: str, output_file: str, excluded_areas: Set[str]) -> None:
+def filter_earth_awy(input_file: str, file_output: BinaryIO, excluded_areas: Set[str]) -> None:
     """
     Filter out airways where both endpoints are in specified areas.
     
+    The file is read and split in one call, the lines are handled as raw bytes
+    and the kept ones are written to file_output in one batch with
+    OUTPUT_NEWLINE, whatever line ending the input used. The terminator line is
+    dropped so new airways can follow before it is written by the caller.
+    
     Args:
         input_file: Path to the original earth_awy.dat file
-        output_file: Path to write the filtered file
+        file_output: Open binary file to write the filtered lines to
         excluded_areas: Set of area codes to exclude (e.g., Chinese airspace codes)
         
     Raises:
@@ -257,77 +257,122 @@ def filter_earth_awy(input_file: str, output_file: str, excluded_areas: Set[str]
     if not os.path.exists(input_file):
         raise FileNotFoundError(f"Input file not found: {input_file}")
     
-    # Ensure output directory exists
-    os.makedirs(os.path.dirname(output_file), exist_ok=True)
-    
-    header_lines = []
-    content_lines = []
+    # Area codes are two-letter ICAO regions, so one startswith() call against
+    # all excluded codes replaces separate set lookups
+    excluded_prefixes = tuple(sorted(area.encode('utf-8') for area in excluded_areas))
     has_terminator = False
     filtered_count = 0
     in_header = True  # Flag to track if we're still in the header section
+    kept_lines = []
     
     try:
-        with open(input_file, 'r', encoding='utf-8') as file_input:
-            for line in tqdm(file_input, desc="Filtering Airways"):
-                # Preserve header section (everything until we encounter the first valid airway line)
-                if in_header:
-                    # Check if this might be an airway line (contains at least 11 parts)
-                    parts = line.strip().split()
-                    if len(parts) >= 11 and not line.startswith('I') and not line.startswith('A'):
-                        # This appears to be the first airway line
-                        in_header = False
-                    else:
-                        # Still in header, preserve line
-                        header_lines.append(line)
-                        continue
-                
-                # Check for terminator line
-                if line.strip() == "99":
-                    has_terminator = True
-                    continue
-                
-                # Skip if we're still in header but already handled above
-                if in_header:
-                    continue
-                
-                # Process regular content lines
-                parts = line.strip().split()
-                
-                # Skip incomplete lines
-                if len(parts) < 11:
-                    content_lines.append(line)
-                    continue
-                
-                # Check area codes (positions 1 and 4 in the split line)
-                area_start = parts[1]
-                area_end = parts[4]
-                
-                # Filter out if both endpoints are in excluded areas
-                if area_start in excluded_areas and area_end in excluded_areas:
-                    filtered_count += 1
+        with open(input_file, 'rb') as file_input:
+            lines = file_input.read().splitlines()
+            
+        for line in tqdm(lines, desc="Filtering Airways",
+                         mininterval=PROGRESS_MIN_INTERVAL, miniters=PROGRESS_MIN_ITERS):
+            # Split once per line; split() already ignores surrounding whitespace
+            parts = line.split()
+            
+            # Preserve header section (everything until we encounter the first valid airway line)
+            if in_header:
+                # Check if this might be an airway line (contains at least 11 parts)
+                if len(parts) >= 11 and line[:1] not in (b'I', b'A'):
+                    # This appears to be the first airway line
+                    in_header = False
+                else:
+                    # Still in header, preserve line
+                    kept_lines.append(line)
                     continue
-                
-                # Keep the line if it doesn't match filter criteria
-                content_lines.append(line)
-        
-        # Write filtered content to output file
-        with open(output_file, 'w', encoding='utf-8') as file_output:
-            # Write header
-            file_output.writelines(header_lines)
-            # Write content
-            file_output.writelines(content_lines)
-            # No terminator line yet - it will be added when new airways are appended
-        
+            
+            # Check for terminator line
+            if len(parts) == 1 and parts[0] == b"99":
+                has_terminator = True
+                continue
+            
+            # Skip incomplete lines
+            if len(parts) < 11:
+                kept_lines.append(line)
+                continue
+            
+            # Check area codes (positions 1 and 4 in the split line) and
+            # filter out if both endpoints are in excluded areas
+            if parts[1].startswith(excluded_prefixes) and parts[4].startswith(excluded_prefixes):
+                filtered_count += 1
+                continue
+            
+            # Keep the line if it doesn't match filter criteria
+            kept_lines.append(line)
+
+        # Write all kept lines in one call
+        file_output.writelines(line + OUTPUT_NEWLINE for line in kept_lines)
+
         logging.info(f"Filtered {filtered_count} airways from specified areas")
         
     except Exception as e:
         logging.error(f"Error filtering earth_awy.dat: {str(e)}")
         raise
 
+def emit_segment(
+    fields: Tuple[str, str, str, str, str, str],
+    point_types: Dict[str, Tuple[str, Dict[str, str]]],
+    airway_groups: Dict[str, List[str]],
+    missing_points: Counter
+) -> bool:
+    """
+    Resolve one CSV route segment and add both directions of it to airway_groups.
+    
+    This is the per-row hot path, so it works on plain locals and tuples only.
+    
+    Args:
+        fields: CODE_POINT_START, CODE_TYPE_START, CODE_POINT_END, CODE_TYPE_END,
+            CODE_DIR and TXT_DESIG values of the row
+        point_types: Mapping of point type to its X-Plane type code and the
+            data holding its area code; must contain the start point type
+        airway_groups: Airway line pairs grouped by designator
+        missing_points: Counter of identifiers without an area code
+        
+    Returns:
+        True if the segment was added, False if a point had no area code
+    """
+    start_code, start_type, end_code, end_type, direction, designator = fields
+    
+    # Start point
+    start_type_code, start_data = point_types[start_type]
+    start_area = start_data.get(start_code)
+    if not start_area:
+        missing_points[start_code] += 1
+        return False
+        
+    # End point, unknown types are treated as NDB/VOR
+    end_entry = point_types.get(end_type)
+    if end_entry is None:
+        end_entry = point_types[NavigationType.NDB.code_type]
+    end_type_code, end_data = end_entry
+    end_area = end_data.get(end_code)
+    if not end_area:
+        missing_points[end_code] += 1
+        return False
+        
+    # Format the row-invariant columns once
+    prefix = SEGMENT_PREFIX_FORMAT(
+        start_code, start_area, start_type_code, end_code,
+        end_area, end_type_code, 'N' if direction == 'X' else direction
+    )
+    suffix = SEGMENT_SUFFIX_START + designator + "\n"
+    
+    # Generate both directions of the airway as a single two-line string
+    airway_groups[designator].append(prefix + " 1" + suffix + prefix + " 2" + suffix)
+    return True
+
+
 def convert_csv_to_dat(csv_file: str, earth_fix_path: str, earth_nav_path: str, earth_awy_path: str, excluded_areas: Set[str]) -> None:
     """
     Convert navigation data from CSV format to X-Plane DAT format and append to filtered earth_awy.dat.
     
+    The filtered existing airways and the new airways are written to a temporary
+    file in a single pass, which then replaces earth_awy.dat.
+    
     Args:
         csv_file: Path to input CSV file
         earth_fix_path: Path to earth_fix.dat reference file
@@ -340,17 +385,14 @@ def convert_csv_to_dat(csv_file: str, earth_fix_path: str, earth_nav_path: str,
         ValueError: If input files are invalid
     """
     # Validate input files
-    for file_path in [csv_file, earth_fix_path, earth_nav_path]:
+    for file_path in [csv_file, earth_fix_path, earth_nav_path, earth_awy_path]:
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"File not found: {file_path}")
     
-    # Create a temporary file for filtering
+    # Temporary file the updated airways are written to
     temp_filtered_file = f"{earth_awy_path}.temp"
     
-    # Step 1: Filter out airways from excluded areas
-    filter_earth_awy(earth_awy_path, temp_filtered_file, excluded_areas)
-    
-    # Step 2: Load reference data for new airways
+    # Step 1: Load reference data for new airways
     logging.info("Loading reference data...")
     earth_fix_data = load_fixed_width_data(
         earth_fix_path, 2, 4, 3, {"ENRT"}, 3, "ENRT"
@@ -364,98 +406,125 @@ def convert_csv_to_dat(csv_file: str, earth_fix_path: str, earth_nav_path: str,
         
     logging.info(f"Loaded {len(earth_fix_data)} fix points and {len(earth_nav_data)} nav points")
     
-    # Step 3: Process CSV and generate new airways
-    output_lines = []
+    # Map each point type to its X-Plane type code and the data holding its area code
+    point_types = {
+        nav_type.code_type: (
+            nav_type.type_code,
+            earth_fix_data if nav_type == NavigationType.DESIGNATED_POINT else earth_nav_data
+        )
+        for nav_type in NavigationType
+    }
+    
+    # Step 2: Process CSV and generate new airways
+    # Airway line pairs (both directions of a segment in one string) grouped by
+    # designator.
+    # Sorting the groups instead of every line keeps the sort to one key per airway.
+    airway_groups: Dict[str, List[str]] = defaultdict(list)
     skipped_rows = 0
-    processed_rows = 0
+    incomplete_rows = 0
+    # Collected per point and reported once, logging every miss dominates the loop
+    missing_points: Counter = Counter()
+    unknown_types: Counter = Counter()
+    # Field tuples of the segments emitted so far, repeated segments are emitted once
+    seen_segments: Set[Tuple[str, ...]] = set()
+    duplicate_rows = 0
 
     try:
         with open(csv_file, 'r', encoding='utf-8') as csvfile:
-            reader = csv.DictReader(csvfile)
-            required_fields = {'CODE_POINT_START', 'CODE_TYPE_START', 'CODE_POINT_END', 
-                             'CODE_TYPE_END', 'CODE_DIR', 'TXT_DESIG'}
+            reader = csv.reader(csvfile)
+            required_fields = ('CODE_POINT_START', 'CODE_TYPE_START', 'CODE_POINT_END', 
+                               'CODE_TYPE_END', 'CODE_DIR', 'TXT_DESIG')
             
             # Validate CSV header
-            if not all(field in reader.fieldnames for field in required_fields):
+            csv_header = next(reader, [])
+            if not all(field in csv_header for field in required_fields):
                 raise ValueError(f"CSV file missing required fields: {required_fields}")
+                
+            # Resolve column positions once so rows can be indexed as plain lists
+            field_indices = [csv_header.index(field) for field in required_fields]
+            get_fields = operator.itemgetter(*field_indices)
+            min_row_length = max(field_indices) + 1
             
-            for row in tqdm(reader, desc="Processing Airways"):
-                processed_rows += 1
+            for row in tqdm(reader, desc="Processing Airways",
+                            mininterval=PROGRESS_MIN_INTERVAL, miniters=PROGRESS_MIN_ITERS):
+                if not row:  # Skip blank lines
+                    continue
                 
                 # Validate required fields
-                if not all(row.get(field) for field in required_fields):
-                    logging.warning(f"Row {processed_rows} missing required fields")
+                fields = get_fields(row) if len(row) >= min_row_length else None
+                if not fields or not all(fields):
+                    incomplete_rows += 1
                     skipped_rows += 1
                     continue
                 
-                # Process start point
-                start_point = process_navigation_point(
-                    identifier=row['CODE_POINT_START'],
-                    code_type=row['CODE_TYPE_START'],
-                    earth_fix_data=earth_fix_data,
-                    earth_nav_data=earth_nav_data
-                )
+                # Point codes, types, directions and designators repeat across many
+                # rows; interning lets the kept tuples share one copy of each and
+                # compare equal strings by identity
+                fields = tuple(map(sys.intern, fields))
+                # X and N directions are written identically, key them the same way
+                if fields[4] == 'X':
+                    fields = fields[:4] + ('N', fields[5])
                 
-                if not start_point:
+                # Unknown start types cannot be resolved to an area code
+                start_type = fields[1]
+                if start_type not in point_types:
+                    unknown_types[start_type] += 1
                     skipped_rows += 1
                     continue
-
-                # Use the processed data
-                first_part = start_point.identifier
-                second_part = start_point.area_code
-                third_part = start_point.type.type_code
-
-                # End point processing
-                fourth_part = row['CODE_POINT_END']
                 
-                if row['CODE_TYPE_END'] == 'DESIGNATED_POINT':
-                    sixth_part = '11'
-                    fifth_part = earth_fix_data.get(fourth_part)
-                elif row['CODE_TYPE_END'] == 'VORDME':
-                    sixth_part = '3'
-                    fifth_part = earth_nav_data.get(fourth_part)
-                else:  # Assuming VOR
-                    sixth_part = '2'
-                    fifth_part = earth_nav_data.get(fourth_part)
-
-                if not fifth_part:
-                    logging.warning(f"No area code found for end point {fourth_part}. Skipping row.")
-                    skipped_rows += 1
+                # Skip segments already emitted for an earlier row
+                if fields in seen_segments:
+                    duplicate_rows += 1
                     continue
-
-                # Direction
-                seventh_part = 'N' if row['CODE_DIR'] == 'X' else row['CODE_DIR']
-                
-                # Fixed values
-                ninth_part = '0'
-                tenth_part = '600'
-                eleventh_part = row['TXT_DESIG']
-                
-                # Generate both directions of the airway
-                for i in range(1, 3):
-                    dat_line = (
-                        f"{first_part:>5}{second_part:>3}{third_part:>3}{fourth_part:>6}"
-                        f"{fifth_part:>3}{sixth_part:>3}{seventh_part:>2}{i:>2}{ninth_part:>4}"
-                        f"{tenth_part:>4} {eleventh_part}\n"
-                    )
-                    output_lines.append(dat_line)
+                    
+                if emit_segment(fields, point_types, airway_groups, missing_points):
+                    seen_segments.add(fields)
+                else:
+                    skipped_rows += 1
+                    
+        # The duplicate check is finished, free its set before writing
+        seen_segments.clear()
 
         # Sort new airways
-        output_lines.sort(key=sort_key)
+        sorted_groups = sorted(airway_groups, key=designator_sort_key)
+        line_count = 2 * sum(len(pairs) for pairs in airway_groups.values())
         
-        # Step 4: Append new airways to filtered file
-        with open(temp_filtered_file, 'a', encoding='utf-8') as datfile:
-            # Write new airways
-            datfile.writelines(output_lines)
+        # Step 3: Write filtered existing airways followed by the new ones
+        with open(temp_filtered_file, 'wb', buffering=WRITE_BUFFER_SIZE) as datfile:
+            # Filter out airways from excluded areas
+            filter_earth_awy(earth_awy_path, datfile, excluded_areas)
+            # Write new airways, encoding each airway's lines in one go and
+            # releasing them as soon as they are written. They use the same
+            # line ending as the existing airways.
+            for group in sorted_groups:
+                airway_text = "".join(airway_groups.pop(group))
+                if os.linesep != "\n":
+                    airway_text = airway_text.replace("\n", os.linesep)
+                datfile.write(airway_text.encode('utf-8'))
             # Add terminator line
-            datfile.write("99\n")
+            datfile.write(b"99" + OUTPUT_NEWLINE)
             
-        # Step 5: Replace original file with updated file
+        # Step 4: Replace original file with updated file
         os.replace(temp_filtered_file, earth_awy_path)
 
-        logging.info(f"Processing completed! Added {len(output_lines)} airway segments to {earth_awy_path}")
+        logging.info(f"Processing completed! Added {line_count} airway segments to {earth_awy_path}")
+        if duplicate_rows > 0:
+            logging.info(f"Ignored {duplicate_rows} duplicate rows")
         if skipped_rows > 0:
             logging.warning(f"Skipped {skipped_rows} rows due to missing or invalid data")
+            if incomplete_rows > 0:
+                logging.warning(f"{incomplete_rows} rows were missing required fields")
+            if unknown_types:
+                type_counts = ", ".join(f"{code_type} ({count})" for code_type, count in unknown_types.most_common())
+                logging.warning(f"Skipped rows with unknown start point types: {type_counts}")
+            if missing_points:
+                most_common = ", ".join(
+                    f"{identifier} ({count})"
+                    for identifier, count in missing_points.most_common(MISSING_POINTS_REPORT_LIMIT)
+                )
+                logging.warning(
+                    f"No area code found for {len(missing_points)} points; most frequent: {most_common}"
+                )
                 
     except Exception as e:
         logging.error(f"Error during processing: {str(e)}")